@@ -1,10 +1,38 @@
 #!/usr/bin/env python3
+import functools
+import hashlib
 import json
 import re
 import requests
 import click
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from jinja2 import Environment, FileSystemLoader, Template
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib.
+    orjson = None
+
+
+def _json_loads(data):
+    """Parse JSON from bytes or str, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj, indent: bool = False) -> str:
+    """Serialise obj to a JSON string, using orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None)
 
 # --------------------------------------------
 # Jinja2 environment for default templates
@@ -14,38 +42,196 @@ from jinja2 import Environment, FileSystemLoader, Template
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
 env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
 
+# Look the default template up once at import time; Jinja caches compiled
+# templates internally, but this keeps even the lookup off the per-call path.
+_DEFAULT_TEMPLATE = env.get_template("summary_prompt.j2")
+
+# Constant instructions + JSON schema sent as the chat system message. Keeping
+# this identical across accessions lets Ollama reuse its KV cache for the
+# shared prefix, so only the per-accession metadata has to be processed.
+_SYSTEM_PROMPT = env.get_template("system_prompt.j2").render()
+
+# Summary-cache fingerprint of the default templates. Computed once because
+# the default templates really are fixed for the life of the process - both
+# are bound at import above - so this stays in step with the prompts that
+# are actually sent, even if the files change on disk afterwards.
+_DEFAULT_PROMPT_FP = hashlib.sha1(
+    _SYSTEM_PROMPT.encode("utf-8") + Path(TEMPLATE_DIR, "summary_prompt.j2").read_bytes()
+).hexdigest()[:12]
+
+
+# --------------------------------------------
+# Shared HTTP session
+# --------------------------------------------
+
+# One Session for the whole process so TCP + TLS connections to UniProt and
+# Ollama are kept alive and reused across accessions instead of being
+# re-established for every request.
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept-Encoding": "gzip"})
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+
 
 # --------------------------------------------
 # Core logic
 # --------------------------------------------
 
-def fetch_uniprot_entry(accession: str) -> dict:
-    click.echo(f"[{accession}] [1/5] Fetching UniProt entry...")
-    url = f"https://rest.uniprot.org/uniprotkb/{accession}"
-    headers = {"Accept": "application/json"}
-    r = requests.get(url, headers=headers)
+# UniProt accessions are stable, so cached responses stay valid for a while;
+# refresh after 24 hours to pick up annotation updates.
+_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Accessions per search request; keeps the query string well under URL limits.
+_UNIPROT_BATCH_SIZE = 100
+
+# Only the fields extract_relevant_fields actually reads. A full entry is
+# often 100-500 KB (sequence, features, cross-references); this trims the
+# download and the JSON parse to a few KB per accession.
+_UNIPROT_FIELDS = "accession,protein_name,gene_names,organism_name,cc_function,cc_disease"
+
+
+def _cache_path_for(accession: str, cache_dir: str | None) -> Path | None:
+    if cache_dir is None:
+        return None
+    return Path(cache_dir) / f"{accession}.json"
+
+
+def parse_uniprot(raw: bytes) -> dict:
+    """Parse a raw UniProt entry into a dict."""
+    return _json_loads(raw)
+
+
+def _search_uniprot(accessions) -> list:
+    """
+    Run one search request for the given accessions; returns raw entries.
+
+    Raises requests.RequestException on transport/HTTP errors and ValueError
+    when the response body is malformed or not shaped as expected.
+    """
+    r = _SESSION.get(
+        "https://rest.uniprot.org/uniprotkb/search",
+        params={
+            "query": " OR ".join(f"accession:{acc}" for acc in accessions),
+            "fields": _UNIPROT_FIELDS,
+            "format": "json",
+            "size": len(accessions),
+        },
+        headers={"Accept": "application/json"},
+    )
     r.raise_for_status()
+    body = _json_loads(r.content)  # ValueError on malformed JSON
+    if not isinstance(body, dict) or not isinstance(body.get("results", []), list):
+        raise ValueError("unexpected UniProt search response shape")
+    return body.get("results", [])
+
+
+def fetch_uniprot_batch(accessions, cache_dir: str | None = None) -> dict:
+    """
+    Fetch several UniProt entries at once via the search endpoint.
+
+    Cached entries are served from disk; the rest are retrieved in chunks of
+    up to 100 accessions per request (one round trip each) instead of one
+    request per accession. A failing chunk (e.g. one malformed accession
+    that breaks the whole query) is retried accession by accession, so one
+    bad input cannot take down the rest. Returns a dict mapping primary
+    accession to the entry's raw JSON bytes (see parse_uniprot); accessions
+    that could not be resolved are simply absent from the result.
+    """
+    entries = {}
+    to_fetch = []
+
+    for acc in dict.fromkeys(accessions):
+        cache_path = _cache_path_for(acc, cache_dir)
+        if (
+            cache_path is not None
+            and cache_path.exists()
+            and time.time() - cache_path.stat().st_mtime < _CACHE_TTL_SECONDS
+        ):
+            # Served as bytes straight from disk; nothing is parsed here.
+            entries[acc] = cache_path.read_bytes()
+        else:
+            to_fetch.append(acc)
+
+    if entries:
+        click.echo(f"[1/5] Using {len(entries)} cached UniProt entr{'y' if len(entries) == 1 else 'ies'}.")
+
+    for start in range(0, len(to_fetch), _UNIPROT_BATCH_SIZE):
+        chunk = to_fetch[start:start + _UNIPROT_BATCH_SIZE]
+        click.echo(f"[1/5] Fetching {len(chunk)} UniProt entr{'y' if len(chunk) == 1 else 'ies'}...")
+        try:
+            results = _search_uniprot(chunk)
+        except (requests.RequestException, ValueError) as e:
+            # One bad accession can 400 the combined query, or the body can
+            # come back malformed; retry the chunk one accession at a time
+            # so the rest still resolve.
+            results = []
+            if len(chunk) == 1:
+                click.echo(f"[{chunk[0]}] ERROR: UniProt request failed: {e}", err=True)
+            else:
+                click.echo(f"Batch UniProt request failed ({e}); retrying individually.", err=True)
+                for acc in chunk:
+                    try:
+                        results.extend(_search_uniprot([acc]))
+                    except (requests.RequestException, ValueError) as e:
+                        click.echo(f"[{acc}] ERROR: UniProt request failed: {e}", err=True)
+
+        for entry in results:
+            acc = entry.get("primaryAccession") if isinstance(entry, dict) else None
+            if acc is None:
+                click.echo("WARNING: skipping UniProt result without primaryAccession.", err=True)
+                continue
+            # One serialisation covers both the cache file and the returned
+            # bytes, which downstream code scans/parses as needed.
+            entry_raw = _json_dumps(entry).encode("utf-8")
+            entries[acc] = entry_raw
+            cache_path = _cache_path_for(acc, cache_dir)
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_bytes(entry_raw)
+
+    return entries
+
+
+def fetch_uniprot_entry(accession: str, cache_dir: str | None = None) -> bytes:
+    """Fetch one UniProt entry, returned as raw JSON bytes."""
+    click.echo(f"[{accession}] [1/5] Fetching UniProt entry...")
+    entries = fetch_uniprot_batch([accession], cache_dir=cache_dir)
+    if accession not in entries:
+        raise ValueError(f"UniProt returned no entry for accession '{accession}'.")
     click.echo(f"[{accession}] [1/5] Done fetching UniProt entry.")
-    return r.json()
+    return entries[accession]
+
 
 def extract_relevant_fields(uniprot_json: dict, accession: str) -> dict:
+    """Pull the fields the prompt needs out of a parsed UniProt entry."""
     click.echo(f"[{accession}] [2/5] Extracting relevant fields...")
 
     protein_name = uniprot_json["proteinDescription"]["recommendedName"]["fullName"]["value"]
     gene_names = [g["geneName"]["value"] for g in uniprot_json.get("genes", [])]
     organism = uniprot_json["organism"]["scientificName"]
 
-    comments = uniprot_json.get("comments", [])
     function_texts = []
     disease_texts = []
 
-    for c in comments:
-        if c.get("commentType") == "FUNCTION":
-            for t in c.get("texts", []):
-                function_texts.append(t["value"])
-        if c.get("commentType") == "DISEASE":
-            for t in c.get("texts", []):
-                disease_texts.append(t["value"])
+    # Single pass over the comments; anything that is not FUNCTION or
+    # DISEASE is skipped without even looking up its texts. The ()
+    # default avoids allocating a fresh list per miss.
+    for c in uniprot_json.get("comments", ()):
+        comment_type = c.get("commentType")
+        if comment_type == "FUNCTION":
+            function_texts.extend(t["value"] for t in c.get("texts", ()))
+        elif comment_type == "DISEASE":
+            disease_texts.extend(t["value"] for t in c.get("texts", ()))
 
     click.echo(f"[{accession}] [2/5] Done extracting fields.")
     return {
@@ -56,12 +242,26 @@ def extract_relevant_fields(uniprot_json: dict, accession: str) -> dict:
         "disease_text": "\n".join(disease_texts),
     }
 
-def build_prompt(info: dict, accession: str, prompt_file: str | None = None) -> str:
+@functools.lru_cache(maxsize=32)
+def _load_prompt_template(path: str, mtime: float) -> Template:
     """
-    Build the LLM prompt using Jinja2.
+    Compile a custom prompt template once per file version; the mtime in the
+    cache key picks up edits between calls.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return env.from_string(f.read())
+
 
-    - If prompt_file is provided, load that file as a Jinja2 template (from string).
-    - Otherwise, use the default templates/summary_prompt.j2 file.
+def build_prompt(info: dict, accession: str, prompt_file: str | None = None) -> str:
+    """
+    Build the LLM user prompt using Jinja2.
+
+    - If prompt_file is provided, load that file as a Jinja2 template (from
+      string); it is sent as the whole prompt, without the default system
+      message, since custom templates carry their own instructions.
+    - Otherwise, use the default templates/summary_prompt.j2 file, which only
+      holds the per-accession metadata; the constant instructions live in
+      templates/system_prompt.j2 and go into the chat system message.
     """
     click.echo(f"[{accession}] [3/5] Building prompt...")
 
@@ -72,56 +272,110 @@ def build_prompt(info: dict, accession: str, prompt_file: str | None = None) ->
     }
 
     if prompt_file:
-        # Custom template file passed from CLI (absolute or relative path).
-        with open(prompt_file, "r", encoding="utf-8") as f:
-            content = f.read()
-        template = env.from_string(content)  # treat file as a Jinja2 template string
+        # Custom template file passed from CLI (absolute or relative path),
+        # compiled once per file version and reused across accessions.
+        template = _load_prompt_template(prompt_file, os.path.getmtime(prompt_file))
     else:
-        # Default template from the templates directory
-        template = env.get_template("summary_prompt.j2")
+        # Default template, compiled once at import time
+        template = _DEFAULT_TEMPLATE
 
     prompt = template.render(**context)
     click.echo(f"[{accession}] [3/5] Prompt built.")
     return prompt
 
+# Defensive fallback for backends that wrap the JSON in prose or markdown
+# fences; with Ollama's format="json" the direct parse below always wins.
+# Compiled once at import time to keep it off the per-call path.
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
 def _extract_json_from_text(text: str) -> dict:
     text = text.strip()
     if not text:
         raise ValueError("LLM returned empty response; cannot parse JSON.")
 
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+        return _json_loads(text)
+    except ValueError:
         pass
 
-    match = re.search(r"\{.*\}", text, re.DOTALL)
+    match = _JSON_BLOCK_RE.search(text)
     if match:
         json_str = match.group(0)
         try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
+            return _json_loads(json_str)
+        except ValueError:
             pass
 
     raise ValueError(f"Could not parse JSON from LLM response:\n{text}")
 
-def call_llm(prompt: str, accession: str, model: str) -> dict:
+# Keep the model resident between calls; long enough to cover a whole run
+# (and the next one) so only the very first call ever pays the load cost.
+_KEEP_ALIVE = "30m"
+
+# Ollama serialises generation per model anyway, so let only one thread hold
+# the model slot at a time. The UniProt fetch/extract stages still run in
+# parallel across the pool; this just stops LLM calls from piling up in
+# Ollama's own queue.
+_LLM_SLOT = threading.Semaphore(1)
+
+
+def call_llm(prompt: str, accession: str, model: str, system: str | None = None) -> dict:
     """
     Call a local LLM via Ollama (e.g. llama3, llama3:8b, phi3:instruct) and return JSON.
+
+    Uses the chat API so the constant instructions travel in the system
+    message and Ollama can reuse its KV cache for that shared prefix across
+    accessions, instead of re-processing the full prompt every time.
     """
     click.echo(f"[{accession}] [4/5] Sending prompt to LLM via Ollama (model='{model}')...")
 
-    url = "http://localhost:11434/api/generate"
+    url = "http://localhost:11434/api/chat"
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
     payload = {
         "model": model,
-        "prompt": prompt,
-        "stream": False,
+        "messages": messages,
+        "stream": True,
+        # Constrain decoding so the response is a valid JSON document; this
+        # also stops the model from emitting surrounding prose.
+        "format": "json",
+        "options": {"temperature": 0},
+        # Keep the model loaded between accessions.
+        "keep_alive": _KEEP_ALIVE,
     }
 
-    r = requests.post(url, json=payload)
-    r.raise_for_status()
+    with _LLM_SLOT:
+        r = _SESSION.post(url, json=payload, stream=True)
+        r.raise_for_status()
 
-    data = r.json()
-    raw_text = data.get("response", "")
+        # Ollama streams NDJSON chunks; accumulate the generated text as it
+        # arrives instead of letting the server buffer the whole generation.
+        # Once the buffered text already forms a complete JSON object we can
+        # close the connection early and skip any trailing tokens.
+        parts = []
+        try:
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = _json_loads(line)
+                parts.append(chunk.get("message", {}).get("content", ""))
+                if chunk.get("done"):
+                    break
+                buffered = "".join(parts)
+                opens = buffered.count("{")
+                if opens and opens == buffered.count("}"):
+                    try:
+                        _json_loads(buffered)
+                    except ValueError:
+                        continue
+                    break
+        finally:
+            r.close()
+
+    raw_text = "".join(parts)
 
     click.echo(f"[{accession}] [4/5] LLM responded. Parsing...")
 
@@ -130,29 +384,132 @@ def call_llm(prompt: str, accession: str, model: str) -> dict:
     click.echo(f"[{accession}] [4/5] JSON extracted.")
     return parsed
 
+def _prompt_fingerprint(prompt_file: str | None) -> str:
+    """
+    Hash of the active prompt template, part of the summary-cache key.
+    Custom templates are hashed on every call (they are reloaded per file
+    version, so editing one must invalidate cached summaries); the default
+    templates are bound at import, so their fingerprint is a constant.
+    """
+    if prompt_file:
+        return hashlib.sha1(Path(prompt_file).read_bytes()).hexdigest()[:12]
+    return _DEFAULT_PROMPT_FP
+
+
+def _summary_cache_path(accession: str, model: str, prompt_fp: str, cache_dir: str) -> Path:
+    safe_model = re.sub(r"[^A-Za-z0-9._-]", "_", model)
+    return Path(cache_dir) / "summaries" / f"{accession}.{safe_model}.{prompt_fp}.json"
+
+
+def _summarise_impl(
+    accession: str,
+    prompt_file: str | None,
+    model: str,
+    cache_dir: str | None,
+    uniprot_raw: bytes | None = None,
+) -> dict:
+    """The uncached pipeline: fetch (if needed), extract, prompt, LLM."""
+    if uniprot_raw is None:
+        uniprot_raw = fetch_uniprot_entry(accession, cache_dir=cache_dir)
+
+    info = extract_relevant_fields(parse_uniprot(uniprot_raw), accession)
+    prompt = build_prompt(info, accession, prompt_file=prompt_file)
+    system = None if prompt_file else _SYSTEM_PROMPT
+    return call_llm(prompt, accession, model=model, system=system)
+
+
+@functools.lru_cache(maxsize=1024)
+def _summarise_cached(
+    accession: str,
+    model: str,
+    prompt_fp: str,
+    prompt_file: str | None,
+    cache_dir: str,
+    uniprot_raw: bytes | None = None,
+) -> dict:
+    """
+    In-memory LRU over the on-disk summary cache. A hit skips both the
+    UniProt fetch and the LLM generation; on a miss the batch-prefetched
+    entry bytes are used directly, with a fetch only as fallback.
+
+    uniprot_raw rides along in the cache key, which is harmless: the bytes
+    come from the disk-backed UniProt cache, so repeats of an accession see
+    identical bytes and still hit.
+    """
+    path = _summary_cache_path(accession, model, prompt_fp, cache_dir)
+    if path.exists() and time.time() - path.stat().st_mtime < _CACHE_TTL_SECONDS:
+        click.echo(f"[{accession}] Reusing cached summary.")
+        return _json_loads(path.read_bytes())
+
+    summary = _summarise_impl(accession, prompt_file, model, cache_dir, uniprot_raw=uniprot_raw)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_json_dumps(summary).encode("utf-8"))
+    return summary
+
+
 def summarise_protein(
     accession: str,
     show_raw: bool = False,
     prompt_file: str | None = None,
     model: str = "llama3",
+    cache_dir: str | None = None,
+    uniprot_raw: bytes | None = None,
 ) -> dict:
     click.echo(f"=== [{accession}] Starting summarisation ===")
 
-    uniprot_json = fetch_uniprot_entry(accession)
-
     if show_raw:
+        # The CLI pre-fetches all entries in one batch; fall back to a
+        # single fetch for direct/library calls.
+        if uniprot_raw is None:
+            uniprot_raw = fetch_uniprot_entry(accession, cache_dir=cache_dir)
+        # Echo the response bytes as-is; no decode/re-encode round trip.
         click.echo(f"\n=== RAW UNIPROT DATA ({accession}) ===")
-        click.echo(json.dumps(uniprot_json, indent=2))
+        click.echo(uniprot_raw)
         click.echo("=== END RAW DATA ===\n")
 
-    info = extract_relevant_fields(uniprot_json, accession)
-    prompt = build_prompt(info, accession, prompt_file=prompt_file)
-    summary = call_llm(prompt, accession, model=model)
+    if cache_dir is None:
+        # --no-cache: run the pipeline directly, bypassing both cache layers.
+        summary = _summarise_impl(accession, prompt_file, model, cache_dir, uniprot_raw=uniprot_raw)
+    else:
+        summary = _summarise_cached(
+            accession, model, _prompt_fingerprint(prompt_file), prompt_file, cache_dir, uniprot_raw
+        )
 
     click.echo(f"[{accession}] [5/5] Done.\n")
     return summary
 
 
+def _warm_up(model: str) -> None:
+    """
+    Best-effort background warmup: open the UniProt TLS connection and
+    preload the Ollama model while the CLI is still getting going, so the
+    first real request does not pay DNS + handshake + model-load latency
+    inline. The warmed connections land in the shared session pool.
+    """
+
+    def _uniprot():
+        try:
+            _SESSION.head("https://rest.uniprot.org/", timeout=2)
+        except requests.RequestException:
+            pass
+
+    def _ollama():
+        try:
+            _SESSION.get("http://localhost:11434/api/tags", timeout=2)
+            # An empty prompt makes Ollama load the model without generating.
+            _SESSION.post(
+                "http://localhost:11434/api/generate",
+                json={"model": model, "prompt": "", "keep_alive": _KEEP_ALIVE},
+                timeout=5,
+            )
+        except requests.RequestException:
+            pass
+
+    threading.Thread(target=_uniprot, daemon=True).start()
+    threading.Thread(target=_ollama, daemon=True).start()
+
+
 # --------------------------------------------
 # CLI definition with Click
 # --------------------------------------------
@@ -174,7 +531,18 @@ def summarise_protein(
     show_default=True,
     help="Ollama model name to use (e.g. 'llama3', 'llama3.2', 'gpt-oss').",
 )
-def cli(accessions, raw, out, compact, prompt_file, model):
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory for cached UniProt responses and summaries (default: per-user app cache).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Disable the on-disk UniProt and summary caches.",
+)
+def cli(accessions, raw, out, compact, prompt_file, model, cache_dir, no_cache):
     """
     Summarise UniProt proteins using a local LLM (Ollama).
 
@@ -193,32 +561,89 @@ def cli(accessions, raw, out, compact, prompt_file, model):
         click.echo("Error: You must provide at least one UniProt accession.", err=True)
         raise SystemExit(1)
 
-    results = {}
+    # Start warming connections and the model while we sort out the cache
+    # and the batch fetch below.
+    _warm_up(model)
 
-    for acc in accessions:
-        try:
-            results[acc] = summarise_protein(
-                acc,
-                show_raw=raw,
-                prompt_file=prompt_file,
-                model=model,
-            )
-        except Exception as e:
-            click.echo(f"[{acc}] ERROR: {e}", err=True)
+    if no_cache:
+        cache_dir = None
+    elif cache_dir is None:
+        cache_dir = os.path.join(click.get_app_dir("gene-briefer"), "uniprot")
+
+    # Duplicate accessions (from the user or an upstream script) would cost
+    # duplicate LLM generations - the expensive step - so process each
+    # accession once, preserving first-seen order.
+    unique_accessions = list(dict.fromkeys(accessions))
+
+    # All UniProt entries come down in a single batched request up front,
+    # instead of one round trip per accession. Fetch failures are reported
+    # per chunk/accession inside the batch; whatever resolved is processed.
+    entries = fetch_uniprot_batch(unique_accessions, cache_dir=cache_dir)
 
+    # Each accession is network-I/O-bound (UniProt + Ollama round-trips),
+    # so run them concurrently instead of paying the latencies one by one.
+    results = {}
+
+    # With --out, stream each summary to disk as soon as it completes, so a
+    # crash late in the run keeps the earlier work and memory stays flat.
+    # Entries are written in completion order.
+    out_file = None
+    first_entry = True
     if out:
-        with open(out, "w", encoding="utf-8") as f:
-            if compact:
-                json.dump(results, f)
-            else:
-                json.dump(results, f, indent=2)
+        out_file = open(out, "w", encoding="utf-8")
+        out_file.write("{" if compact else "{\n")
+
+    with ThreadPoolExecutor(max_workers=min(8, len(unique_accessions))) as executor:
+        futures = {}
+        for acc in unique_accessions:
+            if acc not in entries:
+                click.echo(f"[{acc}] ERROR: no UniProt entry retrieved for this accession.", err=True)
+                continue
+            futures[
+                executor.submit(
+                    summarise_protein,
+                    acc,
+                    show_raw=raw,
+                    prompt_file=prompt_file,
+                    model=model,
+                    cache_dir=cache_dir,
+                    uniprot_raw=entries[acc],
+                )
+            ] = acc
+        for future in as_completed(futures):
+            acc = futures[future]
+            try:
+                results[acc] = future.result()
+            except Exception as e:
+                click.echo(f"[{acc}] ERROR: {e}", err=True)
+                continue
+            if out_file is not None:
+                if not first_entry:
+                    out_file.write("," if compact else ",\n")
+                first_entry = False
+                if compact:
+                    out_file.write(f"{_json_dumps(acc)}:{_json_dumps(results[acc])}")
+                else:
+                    # Shift the summary two spaces so it nests inside the
+                    # top-level object.
+                    entry = _json_dumps(results[acc], indent=True).replace("\n", "\n  ")
+                    out_file.write(f"  {_json_dumps(acc)}: {entry}")
+                out_file.flush()
+
+    # Futures complete in arbitrary order; report in the order given on the
+    # CLI (duplicates collapse onto the same key).
+    results = {acc: results[acc] for acc in accessions if acc in results}
+
+    if out_file is not None:
+        out_file.write("}" if compact else "\n}")
+        out_file.close()
         click.echo(f"Saved summaries to {out}")
     else:
         if len(results) == 1:
             single = next(iter(results.values()))
-            click.echo(json.dumps(single, indent=None if compact else 2))
+            click.echo(_json_dumps(single, indent=not compact))
         else:
-            click.echo(json.dumps(results, indent=None if compact else 2))
+            click.echo(_json_dumps(results, indent=not compact))
 
 
 if __name__ == "__main__":